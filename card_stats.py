@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tablas de conteo (facetas) precalculadas sobre las cartas convertidas.
+
+Se acumulan en la misma pasada en que se arman los índices y se guardan
+en cards-stats.json, para que los listados de la tienda no tengan que
+recorrer todas las cartas. Los scripts incrementales cargan el archivo
+existente y solo suman/restan las cartas que cambian.
+"""
+
+import os
+from typing import Any, Callable, Dict, Iterable, List
+
+from pipeline_config import PipelineConfig
+
+STATS_FILE = "cards-stats.json"
+
+
+def _card_types(card: Dict) -> List[str]:
+    # Mismo criterio que index-by-type.json
+    return card.get('types', [card.get('supertype', 'Unknown')])
+
+
+def _set_field(field: str) -> Callable[[Dict], List[str]]:
+    def extract(card: Dict) -> List[str]:
+        card_set = card.get('set')
+        value = card_set.get(field) if isinstance(card_set, dict) else None
+        return [value] if value else []
+    return extract
+
+
+def _card_field(field: str) -> Callable[[Dict], List[str]]:
+    def extract(card: Dict) -> List[str]:
+        value = card.get(field)
+        return [value] if value else []
+    return extract
+
+
+# Faceta -> función que devuelve los valores de una carta para esa faceta
+FACETS: Dict[str, Callable[[Dict], List[str]]] = {
+    "byRarity": _card_field('rarity'),
+    "bySet": _set_field('id'),
+    "bySeries": _set_field('series'),
+    "byType": _card_types,
+    "bySupertype": _card_field('supertype'),
+    "byArtist": _card_field('artist'),
+    "byRegulationMark": _card_field('regulationMark'),
+}
+
+
+class CardStats:
+    """Conteos de cartas por rareza, set, serie, tipo, artista y regulation mark"""
+
+    def __init__(self):
+        self.total_cards = 0
+        self.facets: Dict[str, Dict[str, int]] = {name: {} for name in FACETS}
+
+    def add(self, card: Dict, delta: int = 1):
+        """Suma (o resta, con delta=-1) una carta a todas las facetas"""
+        self.total_cards += delta
+        for name, extract in FACETS.items():
+            counts = self.facets[name]
+            for value in extract(card):
+                count = counts.get(value, 0) + delta
+                if count > 0:
+                    counts[value] = count
+                else:
+                    counts.pop(value, None)
+
+    def remove(self, card: Dict):
+        """Resta una carta de todas las facetas"""
+        self.add(card, -1)
+
+    def add_all(self, cards: Iterable[Dict]):
+        """Suma una lista de cartas"""
+        for card in cards:
+            self.add(card)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa los conteos, cada faceta ordenada de mayor a menor"""
+        return {
+            "totalCards": self.total_cards,
+            "facets": {
+                name: dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+                for name, counts in self.facets.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CardStats':
+        """Reconstruye los conteos desde el contenido de cards-stats.json"""
+        stats = cls()
+        stats.total_cards = data.get('totalCards', 0)
+        for name, counts in data.get('facets', {}).items():
+            stats.facets[name] = dict(counts)
+        return stats
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Dict]) -> 'CardStats':
+        """Calcula los conteos recorriendo todas las cartas"""
+        stats = cls()
+        stats.add_all(cards)
+        return stats
+
+
+def load_stats(config: PipelineConfig, cards: List[Dict]) -> CardStats:
+    """
+    Carga cards-stats.json. Si no existe o no cuadra con las cartas
+    (p.ej. datos generados antes de existir el archivo), lo recalcula.
+    """
+    if os.path.exists(config.path(STATS_FILE)):
+        data = config.load_json(STATS_FILE)
+        # Se miran las facetas del archivo: from_dict ya trae todas las de FACETS
+        if data.get('totalCards') == len(cards) and set(data.get('facets', {})) == set(FACETS):
+            return CardStats.from_dict(data)
+        print(f"  ⚠️ {STATS_FILE} desactualizado, recalculando...")
+    return CardStats.from_cards(cards)
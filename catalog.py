@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Catálogo de solo lectura sobre los JSON generados por los scripts.
+
+Los valores de index-by-set.json, index-by-name.json e index-by-type.json
+se parsean bajo demanda: al cargar solo se leen los bytes y se ubica
+dónde empieza y termina cada set, nombre o tipo (los archivos indentados
+que generan los scripts tienen cada clave de primer nivel en su propia
+línea). Cada set se parsea la primera vez que se pide, igual que cada
+nombre o tipo buscado. Con --format compact no hay forma barata de
+ubicarlos y se parsea el archivo completo. Las respuestas serializadas
+quedan en un LRU acotado.
+
+Un hilo revisa el lastUpdated de cards-metadata.json; cuando cambia,
+carga la nueva generación en segundo plano, arma sus índices ahí mismo
+y la reemplaza de una vez, sin bloquear a quienes están leyendo la
+anterior.
+
+Uso como servicio HTTP local:
+    python3 catalog.py [puerto]
+    python3 tcg-data.py serve --port 8080 --data-dir ...
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+from card_stats import STATS_FILE
+from pipeline_config import DEFAULT_DATA_DIR
+
+# Respuestas serializadas que se mantienen en memoria
+CACHE_SIZE = 2048
+# Cada cuántos segundos se revisa cards-metadata.json
+WATCH_INTERVAL = 5.0
+
+
+def read_last_updated(data_dir: str) -> Optional[str]:
+    """Lee el lastUpdated de cards-metadata.json (None si no se puede leer)"""
+    try:
+        with open(f"{data_dir}/cards-metadata.json", 'r', encoding='utf-8') as f:
+            return json.load(f).get('lastUpdated')
+    except (OSError, ValueError):
+        return None
+
+
+class LRUCache:
+    """LRU acotado y thread-safe de respuestas ya serializadas"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: 'OrderedDict[Any, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[bytes]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: bytes):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# En un JSON escrito con indent=2 cada clave de primer nivel empieza una
+# línea con dos espacios (lo anidado va más indentado y los strings no
+# contienen saltos de línea sin escapar)
+TOP_LEVEL_PREFIX = b'\n  "'
+TOP_LEVEL_KEY = re.compile(rb'((?:[^"\\\n]|\\.)*)": ')
+
+
+def scan_top_level(data: bytes) -> Optional[Dict[str, Tuple[int, int]]]:
+    """
+    Ubica el valor de cada clave del objeto principal de un JSON indentado
+    sin parsearlo. Devuelve None si el archivo no está indentado
+    """
+    if not data.startswith(b'{\n'):
+        return None
+    spans = {}
+    key = None
+    start = 0
+    position = data.find(TOP_LEVEL_PREFIX)
+    while position != -1:
+        match = TOP_LEVEL_KEY.match(data, position + len(TOP_LEVEL_PREFIX))
+        if match is None:
+            return None
+        if key is not None:
+            spans[key] = (start, position)
+        key = json.loads(b'"' + match.group(1) + b'"')
+        start = match.end()
+        position = data.find(TOP_LEVEL_PREFIX, start)
+    if key is not None:
+        spans[key] = (start, data.rindex(b'}'))
+    return spans
+
+
+class LazyJsonObject:
+    """Objeto JSON de primer nivel cuyos valores se parsean la primera vez que se piden"""
+
+    def __init__(self, filepath: str):
+        with open(filepath, 'rb') as f:
+            self._data = f.read()
+        self._values: Dict[str, Any] = {}
+        self._spans = scan_top_level(self._data)
+        if self._spans is None:
+            # Sin indentar no se pueden ubicar los valores: se parsea todo
+            self._values = json.loads(self._data)
+            self._spans = {key: None for key in self._values}
+            self._data = b''
+        self._lock = threading.Lock()
+
+    def keys(self) -> List[str]:
+        return list(self._spans)
+
+    def get(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        span = self._spans.get(key)
+        if span is None:
+            return None
+        value = json.JSONDecoder().raw_decode(self._data[span[0]:span[1]].decode('utf-8'))[0]
+        with self._lock:
+            return self._values.setdefault(key, value)
+
+    def loaded(self) -> int:
+        return len(self._values)
+
+
+class CatalogGeneration:
+    """Una versión inmutable de los datos (un valor de lastUpdated)"""
+
+    def __init__(self, data_dir: str, cache_size: int):
+        self.last_updated = read_last_updated(data_dir)
+        self._raw_sets = LazyJsonObject(f"{data_dir}/index-by-set.json")
+        self._raw_names = LazyJsonObject(f"{data_dir}/index-by-name.json")
+        self._raw_types = LazyJsonObject(f"{data_dir}/index-by-type.json")
+        self.facets = None
+        if os.path.exists(f"{data_dir}/{STATS_FILE}"):
+            with open(f"{data_dir}/{STATS_FILE}", 'r', encoding='utf-8') as f:
+                self.facets = json.load(f)
+        self.cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._sets: Dict[str, Dict[str, Dict]] = {}
+        self._name_keys: Optional[Dict[str, List[str]]] = None
+        self._type_keys: Optional[Dict[str, List[str]]] = None
+
+    def set_ids(self) -> List[str]:
+        return self._raw_sets.keys()
+
+    def materialized_sets(self) -> int:
+        return len(self._sets)
+
+    def _materialize_set(self, set_id: str) -> Optional[Dict[str, Dict]]:
+        """Mapa id -> carta de un set, parseado la primera vez que se pide"""
+        cards_by_id = self._sets.get(set_id)
+        if cards_by_id is not None:
+            return cards_by_id
+        raw_cards = self._raw_sets.get(set_id)
+        if raw_cards is None:
+            return None
+        with self._lock:
+            cards_by_id = self._sets.get(set_id)
+            if cards_by_id is None:
+                cards_by_id = {card['id']: card for card in raw_cards}
+                self._sets[set_id] = cards_by_id
+        return cards_by_id
+
+    def _build_indices(self):
+        """Claves en minúsculas de los índices por nombre y tipo; se arman la primera vez que se usan"""
+        # _name_keys se asigna último: si ya está, _type_keys también
+        if self._name_keys is not None:
+            return
+        with self._lock:
+            if self._name_keys is not None:
+                return
+            type_keys: Dict[str, List[str]] = {}
+            for key in self._raw_types.keys():
+                type_keys.setdefault(key.lower(), []).append(key)
+            name_keys: Dict[str, List[str]] = {}
+            for key in self._raw_names.keys():
+                name_keys.setdefault(key.lower(), []).append(key)
+            self._type_keys = type_keys
+            self._name_keys = name_keys
+
+    def warm(self):
+        """Arma los índices de antemano (antes de publicar la generación)"""
+        self._build_indices()
+
+    def get_card(self, card_id: str) -> Optional[Dict]:
+        # El ID de carta es "{set_id}-{número}" y el set puede tener guiones:
+        # se prueba desde el último guion hacia atrás
+        parts = card_id.split('-')
+        for i in range(len(parts) - 1, 0, -1):
+            cards_by_id = self._materialize_set('-'.join(parts[:i]))
+            if cards_by_id is not None and card_id in cards_by_id:
+                return cards_by_id[card_id]
+        return None
+
+    def get_set(self, set_id: str) -> Optional[List[Dict]]:
+        cards_by_id = self._materialize_set(set_id)
+        return list(cards_by_id.values()) if cards_by_id is not None else None
+
+    def find_by_name(self, name: str) -> List[Dict]:
+        self._build_indices()
+        return [card for key in self._name_keys.get(name.lower(), []) for card in self._raw_names.get(key)]
+
+    def find_by_type(self, card_type: str) -> List[Dict]:
+        self._build_indices()
+        return [card for key in self._type_keys.get(card_type.lower(), []) for card in self._raw_types.get(key)]
+
+
+class Catalog:
+    """
+    Punto de entrada del catálogo. Cada consulta toma la generación
+    vigente una sola vez, así un reemplazo en medio no la afecta.
+    """
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, cache_size: int = CACHE_SIZE,
+                 watch_interval: float = WATCH_INTERVAL):
+        self.data_dir = data_dir
+        self.cache_size = cache_size
+        self.watch_interval = watch_interval
+        self.generation = CatalogGeneration(data_dir, cache_size)
+        self.reloads = 0
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    # --- Consultas (objetos Python) ---
+
+    def get_card(self, card_id: str) -> Optional[Dict]:
+        return self.generation.get_card(card_id)
+
+    def get_set(self, set_id: str) -> Optional[List[Dict]]:
+        return self.generation.get_set(set_id)
+
+    def find_by_name(self, name: str) -> List[Dict]:
+        return self.generation.find_by_name(name)
+
+    def find_by_type(self, card_type: str) -> List[Dict]:
+        return self.generation.find_by_type(card_type)
+
+    def facets(self) -> Optional[Dict]:
+        return self.generation.facets
+
+    # --- Consultas (JSON serializado, con LRU) ---
+
+    def response(self, kind: str, key: str = '') -> Optional[bytes]:
+        """
+        Respuesta JSON serializada de una consulta: kind es 'card', 'set',
+        'name', 'type' o 'facets'. Devuelve None si no existe.
+        """
+        generation = self.generation
+        if kind in ('name', 'type'):
+            # Búsquedas sin distinguir mayúsculas: una sola entrada en el LRU
+            key = key.lower()
+        cache_key = (kind, key)
+        body = generation.cache.get(cache_key)
+        if body is not None:
+            return body
+
+        if kind == 'card':
+            result = generation.get_card(key)
+        elif kind == 'set':
+            result = generation.get_set(key)
+        elif kind == 'name':
+            result = generation.find_by_name(key)
+        elif kind == 'type':
+            result = generation.find_by_type(key)
+        elif kind == 'facets':
+            result = generation.facets
+        else:
+            raise ValueError(f"Tipo de consulta desconocido: {kind}")
+        if result is None:
+            return None
+
+        body = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        generation.cache.put(cache_key, body)
+        return body
+
+    # --- Recarga en caliente ---
+
+    def reload_if_changed(self) -> bool:
+        """Carga una nueva generación si cambió lastUpdated; True si la reemplazó"""
+        last_updated = read_last_updated(self.data_dir)
+        if last_updated is None or last_updated == self.generation.last_updated:
+            return False
+        try:
+            new_generation = CatalogGeneration(self.data_dir, self.cache_size)
+            new_generation.warm()
+        except (OSError, ValueError) as e:
+            # Archivos a medio escribir: se reintenta en la próxima revisión
+            print(f"⚠️ No se pudo recargar el catálogo: {e}")
+            return False
+        self.generation = new_generation
+        self.reloads += 1
+        print(f"🔄 Catálogo recargado ({new_generation.last_updated})")
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval):
+            self.reload_if_changed()
+
+    def start_watching(self):
+        """Inicia el hilo que revisa cards-metadata.json"""
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def info(self) -> Dict[str, Any]:
+        generation = self.generation
+        return {
+            "lastUpdated": generation.last_updated,
+            "sets": len(generation.set_ids()),
+            "materializedSets": generation.materialized_sets(),
+            "cachedResponses": len(generation.cache),
+            "cacheHits": generation.cache.hits,
+            "cacheMisses": generation.cache.misses,
+            "reloads": self.reloads,
+        }
+
+
+# Rutas del servicio HTTP -> tipo de consulta
+ROUTES = {
+    'cards': 'card',
+    'sets': 'set',
+    'types': 'type',
+}
+
+
+def make_handler(catalog: Catalog):
+    class CatalogRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+            if parts == ['search']:
+                names = parse_qs(url.query).get('name', [])
+                body = catalog.response('name', names[0]) if names else None
+            elif parts == ['facets']:
+                body = catalog.response('facets')
+            elif parts == ['info']:
+                body = json.dumps(catalog.info()).encode('utf-8')
+            elif len(parts) == 2 and parts[0] in ROUTES:
+                body = catalog.response(ROUTES[parts[0]], parts[1])
+            else:
+                body = None
+
+            if body is None:
+                self.send_response(404)
+                body = b'{"error": "not found"}'
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CatalogRequestHandler
+
+
+def serve(catalog: Catalog, port: int = 8080):
+    """Sirve el catálogo por HTTP: /cards/{id}, /sets/{id}, /types/{tipo}, /search?name=, /facets, /info"""
+    catalog.start_watching()
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(catalog))
+    print(f"📚 Catálogo en http://127.0.0.1:{port} ({catalog.info()['sets']} sets)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        catalog.stop_watching()
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    catalog = Catalog()
+    print(f"Catálogo cargado en {time.perf_counter() - start:.2f}s")
+    serve(catalog, int(sys.argv[1]) if len(sys.argv) > 1 else 8080)
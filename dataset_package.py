@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Paquetes de distribución del dataset para los nodos que lo consumen.
+
+Cada vez que se empaqueta se genera una nueva generación con:
+  - un snapshot completo comprimido (zstd, o gzip si no está instalado
+    el módulo zstandard),
+  - un delta respecto de la generación anterior, con solo las cartas
+    nuevas o modificadas (según el hash de su contenido) y los IDs
+    eliminados,
+  - manifest.json con las generaciones, checksums y archivos.
+
+Los índices (index-by-*.json) no viajan: se regeneran desde all-cards.json
+al aplicar. Cada generación se identifica por una huella que combina el
+checksum de las cartas, la metadata y los archivos extra. El aplicador
+busca la generación cuya huella coincide con la copia local, aplica en
+orden solo los deltas que faltan (o el snapshot si no hay base) y
+verifica los checksums en cada paso.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.request import urlopen
+
+from card_stats import STATS_FILE
+from pipeline_config import PipelineConfig
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MANIFEST_FILE = "manifest.json"
+# Estado del último empaquetado (hashes por carta). Vive en la carpeta de
+# datos y no en la de paquetes, para que no se distribuya
+STATE_FILE = "package-state.json"
+# Carpeta de paquetes por defecto, dentro de la carpeta de datos
+PACKAGE_DIR = "dist"
+# Archivos que viajan completos cuando cambian (además de las cartas)
+EXTRA_FILES = [STATS_FILE]
+EXTRA_FILE_PATTERNS = ["cards-i18n-*.json"]
+
+CODEC_EXTENSIONS = {'zstd': 'zst', 'gzip': 'gz'}
+
+
+# --- Compresión ---
+
+def default_codec() -> str:
+    return 'zstd' if zstandard is not None else 'gzip'
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Se necesita el módulo zstandard (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    return gzip.compress(data, compresslevel=9)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Se necesita el módulo zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+# --- Hashes y checksums ---
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def card_hash(card: Dict) -> str:
+    """Hash del contenido de una carta (independiente del orden de las claves)"""
+    canonical = json.dumps(card, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return sha256_bytes(canonical.encode('utf-8'))[:32]
+
+
+def dataset_checksum(order: List[str], hashes: Dict[str, str]) -> str:
+    """Checksum del dataset: IDs en orden más el hash de cada carta"""
+    digest = hashlib.sha256()
+    for card_id in order:
+        digest.update(f"{card_id}:{hashes[card_id]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def data_hash(data: Any) -> str:
+    return sha256_bytes(json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+
+def generation_fingerprint(checksum: str, metadata_hash: str, extra_hashes: Dict[str, str]) -> str:
+    """
+    Huella de una generación: cartas, metadata y archivos extra. Dos
+    generaciones con las mismas cartas pero distinto lastUpdated o
+    distintos archivos de idiomas tienen huellas distintas
+    """
+    return data_hash({"checksum": checksum, "metadata": metadata_hash, "files": extra_hashes})
+
+
+# --- Índices derivados ---
+
+def build_indices(cards: List[Dict]) -> Tuple[Dict, Dict, Dict]:
+    """Arma index-by-set, index-by-type e index-by-name igual que los scripts"""
+    index_by_set: Dict[str, List[Dict]] = {}
+    index_by_type: Dict[str, List[Dict]] = {}
+    index_by_name: Dict[str, List[Dict]] = {}
+    for card in cards:
+        card_set = card.get('set')
+        set_id = card_set.get('id') if isinstance(card_set, dict) else None
+        index_by_set.setdefault(set_id, []).append(card)
+        for card_type in card.get('types', [card.get('supertype', 'Unknown')]):
+            index_by_type.setdefault(card_type, []).append(card)
+        index_by_name.setdefault(card.get('name', 'Unknown'), []).append(card)
+    return index_by_set, index_by_type, index_by_name
+
+
+def extra_file_names(config: PipelineConfig) -> List[str]:
+    names = [name for name in EXTRA_FILES if os.path.exists(config.path(name))]
+    for pattern in EXTRA_FILE_PATTERNS:
+        names += sorted(os.path.basename(path) for path in glob.glob(config.path(pattern)))
+    return names
+
+
+# --- Lectura/escritura de archivos del paquete ---
+
+def read_package_file(source: str, name: str) -> bytes:
+    """Lee un archivo del paquete desde una carpeta local o una URL base"""
+    if source.startswith(('http://', 'https://')):
+        with urlopen(f"{source.rstrip('/')}/{name}", timeout=60) as response:
+            return response.read()
+    with open(os.path.join(source, name), 'rb') as f:
+        return f.read()
+
+
+def write_atomic(path: str, data: bytes):
+    """
+    Escribe un archivo de una sola vez: primero a un temporal y luego
+    os.replace, así quien lo lea nunca ve un archivo a medio escribir
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def save_json_atomic(config: PipelineConfig, filename: str, data: Any):
+    """Como config.save_json, pero con write_atomic"""
+    print(f"Guardando {filename}...")
+    if config.output_format == 'compact':
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    else:
+        raw = json.dumps(data, ensure_ascii=False, indent=2)
+    write_atomic(config.path(filename), raw.encode('utf-8'))
+
+
+def write_compressed(package_dir: str, name: str, data: Any, codec: str) -> Dict[str, Any]:
+    raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    packed = compress(raw, codec)
+    write_atomic(os.path.join(package_dir, name), packed)
+    return {"file": name, "sha256": sha256_bytes(packed), "bytes": len(packed), "rawBytes": len(raw)}
+
+
+def read_compressed(source: str, entry: Dict[str, Any], codec: str) -> Any:
+    packed = read_package_file(source, entry['file'])
+    if sha256_bytes(packed) != entry['sha256']:
+        raise ValueError(f"Checksum incorrecto en {entry['file']}")
+    return json.loads(decompress(packed, codec))
+
+
+# --- Empaquetado ---
+
+def build_package(config: PipelineConfig, package_dir: Optional[str] = None) -> Optional[Dict]:
+    """
+    Genera una nueva generación en package_dir (snapshot + delta respecto
+    de la anterior). Devuelve el manifest, o None si no hubo cambios.
+    """
+    package_dir = package_dir or config.path(PACKAGE_DIR)
+    os.makedirs(package_dir, exist_ok=True)
+    print("=" * 80)
+    print("EMPAQUETADO DEL DATASET")
+    print(f"Destino: {package_dir}")
+    print("=" * 80)
+
+    all_cards = config.load_json('all-cards.json')
+    metadata = config.load_json('cards-metadata.json')
+    extras = {name: config.load_json(name) for name in extra_file_names(config)}
+
+    order = [card['id'] for card in all_cards]
+    hashes = {card['id']: card_hash(card) for card in all_cards}
+    checksum = dataset_checksum(order, hashes)
+    extra_hashes = {name: data_hash(data) for name, data in extras.items()}
+
+    state_path = config.path(STATE_FILE)
+    manifest_path = os.path.join(package_dir, MANIFEST_FILE)
+    state = None
+    manifest = None
+    if os.path.exists(state_path) and os.path.exists(manifest_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if state['generation'] != manifest.get('latest'):
+            print("⚠️ El estado local no corresponde a esta carpeta de paquetes, se empieza de cero")
+            state = None
+            manifest = None
+
+    if state and state['checksum'] == checksum and state['metadataHash'] == data_hash(metadata) \
+            and state['extraHashes'] == extra_hashes:
+        print("\n✓ Sin cambios desde la última generación, no se genera paquete")
+        return None
+
+    codec = manifest['codec'] if manifest else default_codec()
+    if codec == 'gzip' and zstandard is None and not manifest:
+        print("⚠️ Módulo zstandard no instalado, se usa gzip")
+    extension = CODEC_EXTENSIONS[codec]
+    generation = state['generation'] + 1 if state else 1
+    manifest = manifest or {"format": 1, "codec": codec, "generations": [], "deltas": []}
+
+    # 1. Delta respecto de la generación anterior
+    if state:
+        old_order = state['order']
+        old_hashes = state['hashes']
+        new_ids = set(order)
+        removals = [card_id for card_id in old_order if card_id not in new_ids]
+        upserts = [card for card in all_cards if old_hashes.get(card['id']) != hashes[card['id']]]
+        # El orden solo viaja si aplicar el delta no lo reproduce tal cual
+        removed = set(removals)
+        applied_order = [card_id for card_id in old_order if card_id not in removed]
+        applied_order += [card_id for card_id in order if card_id not in old_hashes]
+        delta = {
+            "from": state['generation'],
+            "to": generation,
+            "baseChecksum": state['checksum'],
+            "checksum": checksum,
+            "metadata": metadata,
+            "upserts": upserts,
+            "removals": removals,
+            "order": order if applied_order != order else None,
+            "files": {
+                name: data for name, data in extras.items()
+                if state['extraHashes'].get(name) != extra_hashes[name]
+            },
+            "removedFiles": [name for name in state['extraHashes'] if name not in extra_hashes],
+        }
+        entry = write_compressed(package_dir, f"delta-{state['generation']}-{generation}.json.{extension}", delta, codec)
+        entry.update({"from": state['generation'], "to": generation,
+                      "upserts": len(upserts), "removals": len(removals)})
+        manifest['deltas'].append(entry)
+        print(f"\n📦 Delta {state['generation']} → {generation}: {len(upserts):,} cartas nuevas/modificadas, "
+              f"{len(removals):,} eliminadas, {entry['bytes']:,} bytes")
+
+    # 2. Snapshot completo (solo se conserva el último)
+    snapshot = {
+        "generation": generation,
+        "checksum": checksum,
+        "metadata": metadata,
+        "cards": all_cards,
+        "files": extras,
+    }
+    old_snapshot = manifest.get('snapshot')
+    entry = write_compressed(package_dir, f"snapshot-{generation}.json.{extension}", snapshot, codec)
+    entry.update({"generation": generation, "checksum": checksum})
+    manifest['snapshot'] = entry
+    print(f"📦 Snapshot {generation}: {len(all_cards):,} cartas, {entry['bytes']:,} bytes "
+          f"({entry['rawBytes']:,} sin comprimir)")
+
+    # 3. Manifest y estado
+    manifest['latest'] = generation
+    manifest['generations'].append({
+        "generation": generation,
+        "lastUpdated": metadata.get('lastUpdated'),
+        "totalCards": len(all_cards),
+        "checksum": checksum,
+        "fingerprint": generation_fingerprint(checksum, data_hash(metadata), extra_hashes),
+    })
+    write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    write_atomic(state_path, json.dumps({
+        "generation": generation,
+        "checksum": checksum,
+        "metadataHash": data_hash(metadata),
+        "extraHashes": extra_hashes,
+        "order": order,
+        "hashes": hashes,
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    # El snapshot anterior se borra recién cuando el manifest nuevo ya no lo referencia
+    if old_snapshot and old_snapshot['file'] != entry['file']:
+        old_path = os.path.join(package_dir, old_snapshot['file'])
+        if os.path.exists(old_path):
+            os.remove(old_path)
+
+    print(f"\n✅ Generación {generation} lista ({codec})")
+    print("=" * 80)
+    return manifest
+
+
+# --- Aplicación ---
+
+def apply_delta(cards: List[Dict], delta: Dict) -> List[Dict]:
+    """Aplica un delta a la lista de cartas y devuelve la nueva lista"""
+    removed = set(delta['removals'])
+    upserts = {card['id']: card for card in delta['upserts']}
+    result = []
+    for card in cards:
+        if card['id'] in removed:
+            continue
+        result.append(upserts.pop(card['id'], card))
+    # Lo que queda en upserts son cartas nuevas, en el orden del delta
+    result.extend(upserts.values())
+    if delta.get('order'):
+        by_id = {card['id']: card for card in result}
+        result = [by_id[card_id] for card_id in delta['order']]
+    return result
+
+
+def cards_checksum(cards: List[Dict]) -> str:
+    return dataset_checksum([card['id'] for card in cards], {card['id']: card_hash(card) for card in cards})
+
+
+def apply_package(config: PipelineConfig, source: str) -> bool:
+    """
+    Actualiza la copia local (config.data_dir) a la última generación del
+    paquete en source (carpeta o URL base). Devuelve True si quedó al día.
+    """
+    print("=" * 80)
+    print("APLICACIÓN DE PAQUETE")
+    print(f"Origen: {source}")
+    print(f"Destino: {config.data_dir}")
+    print("=" * 80)
+
+    manifest = json.loads(read_package_file(source, MANIFEST_FILE))
+    codec = manifest['codec']
+    latest = manifest['latest']
+    transferred = len(json.dumps(manifest))
+
+    # 1. Identificar la generación local por su huella (cartas, metadata y
+    # archivos extra). Una aplicación interrumpida no coincide con ninguna
+    cards = None
+    local_generation = None
+    if os.path.exists(config.path('all-cards.json')) and os.path.exists(config.path('cards-metadata.json')):
+        cards = config.load_json('all-cards.json')
+        local_fingerprint = generation_fingerprint(
+            cards_checksum(cards),
+            data_hash(config.load_json('cards-metadata.json')),
+            {name: data_hash(config.load_json(name)) for name in extra_file_names(config)},
+        )
+        for generation in manifest['generations']:
+            if generation.get('fingerprint') == local_fingerprint:
+                local_generation = generation['generation']
+        if local_generation == latest:
+            print(f"\n✓ La copia local ya está en la generación {latest}")
+            return True
+
+    # 2. Cadena de deltas desde la generación local hasta la última
+    deltas_by_from = {entry['from']: entry for entry in manifest['deltas']}
+    chain = []
+    current = local_generation
+    while current is not None and current != latest and current in deltas_by_from:
+        chain.append(deltas_by_from[current])
+        current = deltas_by_from[current]['to']
+
+    files: Dict[str, Any] = {}
+    removed_files: List[str] = []
+    if local_generation is not None and current == latest:
+        metadata = None
+        for entry in chain:
+            delta = read_compressed(source, entry, codec)
+            transferred += entry['bytes']
+            if cards_checksum(cards) != delta['baseChecksum']:
+                raise ValueError(f"La copia local no coincide con la base del delta {entry['file']}")
+            cards = apply_delta(cards, delta)
+            if cards_checksum(cards) != delta['checksum']:
+                raise ValueError(f"Checksum incorrecto tras aplicar {entry['file']}")
+            metadata = delta['metadata']
+            files.update(delta['files'])
+            for name in delta.get('removedFiles', []):
+                files.pop(name, None)
+                removed_files.append(name)
+            print(f"  ✓ Delta {entry['from']} → {entry['to']}: {entry['upserts']:,} cartas, "
+                  f"{entry['removals']:,} eliminadas ({entry['bytes']:,} bytes)")
+    else:
+        if local_generation is None:
+            print("\n⚠️ Copia local desconocida o inexistente, se descarga el snapshot completo")
+        else:
+            print(f"\n⚠️ Faltan deltas desde la generación {local_generation}, se descarga el snapshot completo")
+        entry = manifest['snapshot']
+        snapshot = read_compressed(source, entry, codec)
+        transferred += entry['bytes']
+        cards = snapshot['cards']
+        if cards_checksum(cards) != snapshot['checksum']:
+            raise ValueError(f"Checksum incorrecto en {entry['file']}")
+        metadata = snapshot['metadata']
+        files.update(snapshot['files'])
+        removed_files = [name for name in extra_file_names(config) if name not in files]
+
+    # 3. Escribir la copia local con los índices regenerados. La metadata
+    # va última: hasta que se escribe, la huella local no coincide con
+    # ninguna generación y un corte se corrige en la próxima aplicación
+    index_by_set, index_by_type, index_by_name = build_indices(cards)
+    os.makedirs(config.data_dir, exist_ok=True)
+    save_json_atomic(config, 'all-cards.json', cards)
+    save_json_atomic(config, 'index-by-set.json', index_by_set)
+    save_json_atomic(config, 'index-by-type.json', index_by_type)
+    save_json_atomic(config, 'index-by-name.json', index_by_name)
+    for name, data in files.items():
+        save_json_atomic(config, name, data)
+    for name in removed_files:
+        if os.path.exists(config.path(name)):
+            os.remove(config.path(name))
+    save_json_atomic(config, 'cards-metadata.json', metadata)
+
+    print("\n" + "=" * 80)
+    print(f"✅ COPIA LOCAL EN LA GENERACIÓN {latest}")
+    print("=" * 80)
+    print(f"Total de cartas: {len(cards):,}")
+    print(f"Transferido: {transferred:,} bytes")
+    print(f"Última actualización: {metadata.get('lastUpdated')}")
+    print("=" * 80)
+    return True
@@ -4,41 +4,41 @@ Script para descargar SOLO los sets faltantes desde TCGdex
 y agregarlos a los archivos JSON existentes.
 """
 
-import json
-import requests
 from datetime import datetime
-from typing import Dict, List, Any
-import time
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from card_stats import STATS_FILE, CardStats, load_stats
+from pipeline_config import PipelineConfig
+from pipeline_metrics import PipelineMetrics
+from rate_controller import AdaptiveRateController, fetch_json
 
 TCGDEX_API = "https://api.tcgdex.net/v2/en"
-DATA_DIR = "/Users/bastiancaba/Desktop/Dev Projects/rpgstore api/pokemon-tcg-data"
+
+# Reporte de la ejecución (tiempos, latencias, throughput)
+METRICS_REPORT_FILE = "run-report-fetch-missing.json"
 
 # Sets faltantes identificados
 MISSING_SET_IDS = ["B1a", "B2", "me02.5"]
 
 
-def load_json_file(filename: str) -> Any:
-    """Carga un archivo JSON existente"""
-    filepath = f"{DATA_DIR}/{filename}"
-    print(f"Cargando {filename}...")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def save_json_file(filename: str, data: Any):
-    """Guarda un archivo JSON"""
-    filepath = f"{DATA_DIR}/{filename}"
-    print(f"Guardando {filename}...")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def find_missing_set_ids(config: PipelineConfig, existing_set_ids: List[str], metrics: PipelineMetrics,
+                         controller: AdaptiveRateController) -> List[str]:
+    """Compara la lista de sets de TCGdex con los que ya están en index-by-set.json"""
+    print("\n🔎 Buscando sets nuevos en TCGdex...")
+    try:
+        sets = fetch_json(f"{TCGDEX_API}/sets", 10, config, metrics, controller)
+    except Exception as e:
+        print(f"  ❌ Error obteniendo la lista de sets: {e}")
+        return []
+    existing = set(existing_set_ids)
+    return [s.get('id') for s in sets if s.get('id') not in existing]
 
 
-def get_set_details(set_id: str) -> Dict:
+def get_set_details(config: PipelineConfig, set_id: str, metrics: PipelineMetrics, controller: AdaptiveRateController) -> Dict:
     """Obtiene los detalles completos de un set con sus cartas"""
     try:
-        response = requests.get(f"{TCGDEX_API}/sets/{set_id}", timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return fetch_json(f"{TCGDEX_API}/sets/{set_id}", 15, config, metrics, controller, label=set_id)
     except Exception as e:
         print(f"  ❌ Error obteniendo {set_id}: {e}")
         return None
@@ -165,28 +165,63 @@ def convert_tcgdex_card_to_pokemontcg_format(tcgdex_card: Dict, tcgdex_set: Dict
     return converted
 
 
-def main():
+def remove_set_cards(old_cards: List[Dict], all_cards: List[Dict], index_by_type: Dict, index_by_name: Dict,
+                     stats: CardStats):
+    """Quita de all-cards, los índices y las estadísticas las cartas de un set que se va a reemplazar"""
+    old_ids = {card['id'] for card in old_cards}
+    all_cards[:] = [card for card in all_cards if card['id'] not in old_ids]
+    for card in old_cards:
+        keys = [(index_by_type, card_type) for card_type in card.get('types', [card.get('supertype', 'Unknown')])]
+        keys.append((index_by_name, card.get('name', 'Unknown')))
+        for index, key in keys:
+            if key not in index:
+                continue
+            index[key] = [indexed for indexed in index[key] if indexed['id'] not in old_ids]
+            if not index[key]:
+                del index[key]
+        stats.remove(card)
+
+
+def add_sets(config: PipelineConfig, metrics: PipelineMetrics, controller: AdaptiveRateController,
+             executor: ThreadPoolExecutor, set_ids: Optional[List[str]] = None, detect: bool = False):
+    """
+    Agrega sets al dataset existente: los de set_ids, los que falten
+    respecto de TCGdex (detect=True) o, por defecto, MISSING_SET_IDS.
+    """
     print("=" * 80)
     print("DESCARGA DE SETS FALTANTES DESDE TCGdex")
-    print(f"Sets a descargar: {', '.join(MISSING_SET_IDS)}")
     print("=" * 80)
 
     # 1. Cargar archivos existentes
     print("\n📂 Cargando datos existentes...")
-    all_cards = load_json_file('all-cards.json')
-    index_by_set = load_json_file('index-by-set.json')
-    index_by_type = load_json_file('index-by-type.json')
-    index_by_name = load_json_file('index-by-name.json')
+    with metrics.stage("load"):
+        all_cards = config.load_json('all-cards.json')
+        index_by_set = config.load_json('index-by-set.json')
+        index_by_type = config.load_json('index-by-type.json')
+        index_by_name = config.load_json('index-by-name.json')
+        stats = load_stats(config, all_cards)
+        previous_metadata = config.load_json('cards-metadata.json')
 
     print(f"  Cartas existentes: {len(all_cards):,}")
     print(f"  Sets existentes: {len(index_by_set)}")
 
-    # 2. Descargar cada set faltante
+    if set_ids is None:
+        if detect:
+            with metrics.stage("fetch"):
+                set_ids = find_missing_set_ids(config, list(index_by_set), metrics, controller)
+        else:
+            set_ids = MISSING_SET_IDS
+
+    print(f"\n📥 Sets a descargar: {', '.join(set_ids) or '(ninguno)'}")
+
+    # 2. Descargar cada set faltante (en paralelo, procesando en orden)
     total_new_cards = 0
-    for i, set_id in enumerate(MISSING_SET_IDS, 1):
-        print(f"\n[{i}/{len(MISSING_SET_IDS)}] Descargando set: {set_id}")
+    futures = [executor.submit(get_set_details, config, set_id, metrics, controller) for set_id in set_ids]
+    for i, (set_id, future) in enumerate(zip(set_ids, futures), 1):
+        print(f"\n[{i}/{len(set_ids)}] Descargando set: {set_id}")
 
-        set_details = get_set_details(set_id)
+        with metrics.stage("fetch"):
+            set_details = future.result()
         if not set_details or 'cards' not in set_details:
             print(f"  ⚠️ Sin cartas para {set_id}")
             continue
@@ -195,37 +230,46 @@ def main():
         cards = set_details.get('cards', [])
         print(f"  📦 {set_name} - {len(cards)} cartas")
 
-        set_cards = []
-        for tcgdex_card in cards:
-            converted_card = convert_tcgdex_card_to_pokemontcg_format(tcgdex_card, set_details)
-
-            # Agregar a all-cards
-            all_cards.append(converted_card)
-            set_cards.append(converted_card)
-
-            # Agregar a index-by-type
-            types = converted_card.get('types', [converted_card.get('supertype', 'Unknown')])
-            for card_type in types:
-                if card_type not in index_by_type:
-                    index_by_type[card_type] = []
-                index_by_type[card_type].append(converted_card)
-
-            # Agregar a index-by-name
-            name = converted_card.get('name', 'Unknown')
-            if name not in index_by_name:
-                index_by_name[name] = []
-            index_by_name[name].append(converted_card)
-
-        # Agregar a index-by-set
-        index_by_set[set_id] = set_cards
+        with metrics.stage("convert"):
+            set_cards = [
+                convert_tcgdex_card_to_pokemontcg_format(tcgdex_card, set_details)
+                for tcgdex_card in cards
+            ]
+
+        with metrics.stage("index"):
+            # Si el set ya estaba se reemplaza: primero se quitan sus cartas anteriores
+            if index_by_set.get(set_id):
+                print(f"  ♻️ Reemplazando las {len(index_by_set[set_id])} cartas que ya tenía el set")
+                remove_set_cards(index_by_set[set_id], all_cards, index_by_type, index_by_name, stats)
+
+            for converted_card in set_cards:
+                # Agregar a all-cards
+                all_cards.append(converted_card)
+
+                # Agregar a index-by-type
+                types = converted_card.get('types', [converted_card.get('supertype', 'Unknown')])
+                for card_type in types:
+                    if card_type not in index_by_type:
+                        index_by_type[card_type] = []
+                    index_by_type[card_type].append(converted_card)
+
+                # Agregar a index-by-name
+                name = converted_card.get('name', 'Unknown')
+                if name not in index_by_name:
+                    index_by_name[name] = []
+                index_by_name[name].append(converted_card)
+
+                # Sumar a las estadísticas (facetas)
+                stats.add(converted_card)
+
+            # Agregar a index-by-set
+            index_by_set[set_id] = set_cards
         total_new_cards += len(cards)
+        metrics.increment("sets")
+        metrics.increment("cards", len(cards))
 
         print(f"  ✅ {len(cards)} cartas agregadas")
 
-        # Pausa para no sobrecargar la API
-        if i < len(MISSING_SET_IDS):
-            time.sleep(1)
-
     # 3. Actualizar metadata
     metadata = {
         "totalCards": len(all_cards),
@@ -238,28 +282,65 @@ def main():
             "byType": len(index_by_type)
         }
     }
+    # Los cards-i18n-*.json se mantienen, pero no incluyen los sets nuevos
+    if previous_metadata.get('locales'):
+        metadata['locales'] = previous_metadata['locales']
+        if set_ids:
+            print(f"\n⚠️ Los archivos de idiomas ({', '.join(metadata['locales'])}) no incluyen los sets nuevos; "
+                  f"correr rebuild con --locales para actualizarlos")
 
     # 4. Guardar todos los archivos actualizados
     print("\n" + "=" * 80)
     print("💾 Guardando archivos actualizados...")
     print("=" * 80)
 
-    save_json_file('all-cards.json', all_cards)
-    save_json_file('index-by-set.json', index_by_set)
-    save_json_file('index-by-type.json', index_by_type)
-    save_json_file('index-by-name.json', index_by_name)
-    save_json_file('cards-metadata.json', metadata)
+    with metrics.stage("write"):
+        config.save_json('all-cards.json', all_cards)
+        config.save_json('index-by-set.json', index_by_set)
+        config.save_json('index-by-type.json', index_by_type)
+        config.save_json('index-by-name.json', index_by_name)
+        config.save_json(STATS_FILE, stats.to_dict())
+        config.save_json('cards-metadata.json', metadata)
 
     # 5. Resumen
     print("\n" + "=" * 80)
     print("✅ ACTUALIZACIÓN COMPLETADA")
     print("=" * 80)
-    print(f"Sets nuevos agregados: {len(MISSING_SET_IDS)}")
+    print(f"Sets nuevos agregados: {len(set_ids)}")
     print(f"Cartas nuevas: {total_new_cards:,}")
     print(f"Total de sets ahora: {len(index_by_set)}")
     print(f"Total de cartas ahora: {len(all_cards):,}")
     print(f"Última actualización: {metadata['lastUpdated']}")
-    print("=" * 80)
+    state = controller.snapshot()
+    print(f"\n📶 Ritmo final: {state['rate']:.1f} req/s, {state['concurrency']:.1f} en paralelo "
+          f"({state['decreases']} reducciones, {state['throttled']} requests limitados)")
+    metrics.print_summary()
+
+
+def main(config: Optional[PipelineConfig] = None, set_ids: Optional[List[str]] = None, detect: bool = False):
+    """Ejecuta add_sets y guarda el reporte de la ejecución"""
+    config = config or PipelineConfig()
+    metrics = PipelineMetrics("fetch-missing")
+    controller = AdaptiveRateController(
+        metrics=metrics,
+        initial_rate=config.initial_rate,
+        max_rate=config.max_rate,
+        max_concurrency=config.workers,
+    )
+    executor = ThreadPoolExecutor(max_workers=config.workers)
+    try:
+        add_sets(config, metrics, controller, executor, set_ids, detect)
+    finally:
+        # Ante un error o Ctrl-C no se siguen descargando los sets en cola
+        controller.cancel()
+        executor.shutdown(cancel_futures=True)
+        # El reporte se escribe también si la ejecución terminó antes o falló
+        metrics.write_report(
+            config.path(METRICS_REPORT_FILE),
+            config.path(config.prometheus_file) if config.prometheus_file else None,
+        )
+        print(f"\n📊 Reporte de la ejecución: {METRICS_REPORT_FILE}")
+        print("=" * 80)
 
 
 if __name__ == "__main__":
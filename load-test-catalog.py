@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga local del catálogo (catalog.py).
+
+Lanza consultas mezcladas (por ID, set, nombre y tipo) desde varios
+hilos contra el catálogo en proceso y reporta latencias p50/p95/p99,
+throughput y tasa de aciertos del LRU.
+"""
+
+import json
+import random
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from catalog import Catalog
+from pipeline_config import PipelineConfig
+from pipeline_metrics import percentile
+
+# Total de consultas y cantidad de hilos que las reparten
+TOTAL_REQUESTS = 50000
+THREADS = 8
+# Proporción de cada tipo de consulta
+QUERY_MIX = {'card': 0.6, 'name': 0.2, 'set': 0.1, 'type': 0.1}
+# Tamaño del LRU durante la prueba
+CACHE_SIZE = 2048
+SEED = 42
+
+
+def build_queries(data_dir: str, count: int) -> List[Tuple[str, str]]:
+    """
+    Arma la lista de consultas. Las claves se eligen con una distribución
+    sesgada (pocas cartas muy consultadas, muchas poco) como en la tienda.
+    Se leen directo del archivo para no materializar sets del catálogo.
+    """
+    rng = random.Random(SEED)
+    with open(f"{data_dir}/index-by-set.json", 'r', encoding='utf-8') as f:
+        index_by_set = json.load(f)
+    set_ids = list(index_by_set)
+    cards = [card for set_cards in index_by_set.values() for card in set_cards]
+    keys = {
+        'card': [card['id'] for card in cards],
+        'name': sorted({card.get('name', '') for card in cards}),
+        'set': set_ids,
+        'type': sorted({t for card in cards for t in card.get('types', [card.get('supertype', 'Unknown')])}),
+    }
+    for values in keys.values():
+        rng.shuffle(values)
+
+    kinds = list(QUERY_MIX)
+    weights = [QUERY_MIX[kind] for kind in kinds]
+    queries = []
+    for kind in rng.choices(kinds, weights=weights, k=count):
+        values = keys[kind]
+        index = min(len(values) - 1, int(rng.paretovariate(1.2)) - 1)
+        queries.append((kind, values[index]))
+    return queries
+
+
+def run_worker(catalog: Catalog, queries: List[Tuple[str, str]], latencies: List[float]):
+    for kind, key in queries:
+        start = time.perf_counter()
+        catalog.response(kind, key)
+        latencies.append(time.perf_counter() - start)
+
+
+def main(config: Optional[PipelineConfig] = None, total_requests: int = TOTAL_REQUESTS,
+         threads: int = THREADS, cache_size: int = CACHE_SIZE):
+    config = config or PipelineConfig()
+    print("=" * 80)
+    print("PRUEBA DE CARGA DEL CATÁLOGO")
+    print(f"{total_requests:,} consultas, {threads} hilos, LRU de {cache_size:,}")
+    print(f"Datos: {config.data_dir}")
+    print("=" * 80)
+
+    queries = build_queries(config.data_dir, total_requests)
+
+    start = time.perf_counter()
+    catalog = Catalog(config.data_dir, cache_size=cache_size)
+    load_seconds = time.perf_counter() - start
+    print(f"\n📂 Catálogo cargado en {load_seconds:.2f}s ({len(catalog.generation.set_ids())} sets)")
+
+    chunks = [queries[i::threads] for i in range(threads)]
+    results: List[List[float]] = [[] for _ in range(threads)]
+    workers = [
+        threading.Thread(target=run_worker, args=(catalog, chunk, result))
+        for chunk, result in zip(chunks, results)
+    ]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for result in results for latency in result]
+    info = catalog.info()
+    lookups = info['cacheHits'] + info['cacheMisses']
+    summary = {
+        "dataDir": config.data_dir,
+        "requests": len(latencies),
+        "threads": threads,
+        "cacheSize": cache_size,
+        "loadSeconds": round(load_seconds, 3),
+        "seconds": round(elapsed, 3),
+        "requestsPerSecond": round(len(latencies) / elapsed, 1),
+        "p50Ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95Ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99Ms": round(percentile(latencies, 99) * 1000, 3),
+        "maxMs": round(max(latencies) * 1000, 3),
+        "cacheHitRate": round(info['cacheHits'] / lookups, 4),
+    }
+
+    print("\n" + "=" * 80)
+    print("✅ RESULTADOS")
+    print("=" * 80)
+    print(f"Consultas: {len(latencies):,} en {elapsed:.2f}s ({summary['requestsPerSecond']:,.0f} consultas/s)")
+    print(f"Latencia p50: {summary['p50Ms']:.3f} ms")
+    print(f"Latencia p95: {summary['p95Ms']:.3f} ms")
+    print(f"Latencia p99: {summary['p99Ms']:.3f} ms")
+    print(f"Latencia máx: {summary['maxMs']:.3f} ms")
+    print(f"Aciertos LRU: {summary['cacheHitRate'] * 100:.1f}% ({info['cachedResponses']:,} respuestas en caché)")
+    print(f"Sets materializados: {info['materializedSets']}/{info['sets']}")
+    print("=" * 80)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -3,36 +3,28 @@
 Script para migrar TODAS las imágenes de pokemontcg.io a TCGdex
 """
 
-import json
 import requests
 from datetime import datetime
-import time
+from typing import Optional
 
-DATA_DIR = "/Users/bastiancaba/Desktop/Dev Projects/rpgstore api/pokemon-tcg-data"
-TCGDEX_API = "https://api.tcgdex.net/v2/en"
+from pipeline_config import PipelineConfig
+from pipeline_metrics import PipelineMetrics
 
-def load_json_file(filename: str):
-    """Carga un archivo JSON"""
-    filepath = f"{DATA_DIR}/{filename}"
-    print(f"Cargando {filename}...")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+TCGDEX_API = "https://api.tcgdex.net/v2/en"
 
-def save_json_file(filename: str, data):
-    """Guarda un archivo JSON"""
-    filepath = f"{DATA_DIR}/{filename}"
-    print(f"Guardando {filename}...")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# Reporte de la ejecución (tiempos, latencias, throughput)
+METRICS_REPORT_FILE = "run-report-migrate-images.json"
 
-def get_tcgdex_set_mapping():
+def get_tcgdex_set_mapping(metrics: PipelineMetrics):
     """
     Obtiene un mapeo de IDs de PokemonTCG a TCGdex
     Algunos sets tienen IDs diferentes entre las dos APIs
     """
     print("\nObteniendo sets de TCGdex...")
     try:
-        response = requests.get(f"{TCGDEX_API}/sets", timeout=10)
+        with metrics.track_request() as request:
+            response = requests.get(f"{TCGDEX_API}/sets", timeout=10)
+            request.status = response.status_code
         response.raise_for_status()
         tcgdex_sets = response.json()
         
@@ -148,7 +140,7 @@ def update_card_images(cards: list, set_mapping: dict) -> int:
     
     return updated_count
 
-def main():
+def migrate_images(config: PipelineConfig, metrics: PipelineMetrics):
     print("=" * 80)
     print("MIGRACIÓN COMPLETA DE IMÁGENES A TCGdex")
     print("=" * 80)
@@ -157,7 +149,8 @@ def main():
     print("=" * 80)
     
     # 1. Obtener mapeo de sets
-    set_mapping, tcgdex_sets = get_tcgdex_set_mapping()
+    with metrics.stage("fetch"):
+        set_mapping, tcgdex_sets = get_tcgdex_set_mapping(metrics)
     
     if not set_mapping:
         print("❌ No se pudo obtener el mapeo de sets")
@@ -165,11 +158,12 @@ def main():
     
     # 2. Cargar archivos
     print("\nCargando archivos...")
-    all_cards = load_json_file('all-cards.json')
-    index_by_set = load_json_file('index-by-set.json')
-    index_by_type = load_json_file('index-by-type.json')
-    index_by_name = load_json_file('index-by-name.json')
-    metadata = load_json_file('cards-metadata.json')
+    with metrics.stage("load"):
+        all_cards = config.load_json('all-cards.json')
+        index_by_set = config.load_json('index-by-set.json')
+        index_by_type = config.load_json('index-by-type.json')
+        index_by_name = config.load_json('index-by-name.json')
+        metadata = config.load_json('cards-metadata.json')
     
     print(f"Total de cartas: {len(all_cards):,}")
     
@@ -178,27 +172,30 @@ def main():
     print("Actualizando URLs de imágenes...")
     print("=" * 80)
     
-    print("\n1. Actualizando all-cards.json...")
-    updated_all = update_card_images(all_cards, set_mapping)
-    print(f"   ✓ {updated_all:,} cartas actualizadas")
-    
-    print("\n2. Actualizando index-by-set.json...")
-    updated_set = 0
-    for set_id, cards in index_by_set.items():
-        updated_set += update_card_images(cards, set_mapping)
-    print(f"   ✓ {updated_set:,} cartas actualizadas")
-    
-    print("\n3. Actualizando index-by-type.json...")
-    updated_type = 0
-    for card_type, cards in index_by_type.items():
-        updated_type += update_card_images(cards, set_mapping)
-    print(f"   ✓ {updated_type:,} cartas actualizadas")
-    
-    print("\n4. Actualizando index-by-name.json...")
-    updated_name = 0
-    for name, cards in index_by_name.items():
-        updated_name += update_card_images(cards, set_mapping)
-    print(f"   ✓ {updated_name:,} cartas actualizadas")
+    with metrics.stage("convert"):
+        print("\n1. Actualizando all-cards.json...")
+        updated_all = update_card_images(all_cards, set_mapping)
+        print(f"   ✓ {updated_all:,} cartas actualizadas")
+        
+        print("\n2. Actualizando index-by-set.json...")
+        updated_set = 0
+        for set_id, cards in index_by_set.items():
+            updated_set += update_card_images(cards, set_mapping)
+        print(f"   ✓ {updated_set:,} cartas actualizadas")
+        
+        print("\n3. Actualizando index-by-type.json...")
+        updated_type = 0
+        for card_type, cards in index_by_type.items():
+            updated_type += update_card_images(cards, set_mapping)
+        print(f"   ✓ {updated_type:,} cartas actualizadas")
+        
+        print("\n4. Actualizando index-by-name.json...")
+        updated_name = 0
+        for name, cards in index_by_name.items():
+            updated_name += update_card_images(cards, set_mapping)
+        print(f"   ✓ {updated_name:,} cartas actualizadas")
+    metrics.increment("cards", len(all_cards))
+    metrics.increment("cards_updated", updated_all)
     
     # 4. Actualizar metadata
     metadata['lastUpdated'] = datetime.now().isoformat() + 'Z'
@@ -208,11 +205,12 @@ def main():
     print("Guardando archivos...")
     print("=" * 80)
     
-    save_json_file('all-cards.json', all_cards)
-    save_json_file('index-by-set.json', index_by_set)
-    save_json_file('index-by-type.json', index_by_type)
-    save_json_file('index-by-name.json', index_by_name)
-    save_json_file('cards-metadata.json', metadata)
+    with metrics.stage("write"):
+        config.save_json('all-cards.json', all_cards)
+        config.save_json('index-by-set.json', index_by_set)
+        config.save_json('index-by-type.json', index_by_type)
+        config.save_json('index-by-name.json', index_by_name)
+        config.save_json('cards-metadata.json', metadata)
     
     # 6. Resumen
     print("\n" + "=" * 80)
@@ -239,7 +237,22 @@ def main():
         print(f"\n  {card['name']} (Set: {card.get('set', {}).get('id', 'N/A')})")
         print(f"    {card['images']['large']}")
     
-    print("=" * 80)
+    metrics.print_summary()
+
+def main(config: Optional[PipelineConfig] = None):
+    """Ejecuta migrate_images y guarda el reporte de la ejecución"""
+    config = config or PipelineConfig()
+    metrics = PipelineMetrics("migrate-images")
+    try:
+        migrate_images(config, metrics)
+    finally:
+        # El reporte se escribe también si la ejecución terminó antes o falló
+        metrics.write_report(
+            config.path(METRICS_REPORT_FILE),
+            config.path(config.prometheus_file) if config.prometheus_file else None,
+        )
+        print(f"\n📊 Reporte de la ejecución: {METRICS_REPORT_FILE}")
+        print("=" * 80)
 
 if __name__ == "__main__":
     main()
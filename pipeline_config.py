@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Configuración compartida por los scripts y por el CLI (tcg-data.py).
+
+Reúne lo que antes estaba fijo en cada script: carpeta de datos,
+paralelismo, límites de ritmo, idiomas y formato de salida. Así se
+pueden correr builds aislados en paralelo (cada uno con su carpeta) y
+comparar configuraciones.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+# Carpeta de datos por defecto: variable de entorno o la carpeta del repo
+DEFAULT_DATA_DIR = os.environ.get(
+    'POKEMON_TCG_DATA_DIR',
+    os.path.dirname(os.path.abspath(__file__)),
+)
+
+OUTPUT_FORMATS = ('pretty', 'compact')
+
+
+@dataclass
+class PipelineConfig:
+    """Opciones de una ejecución"""
+
+    data_dir: str = DEFAULT_DATA_DIR
+    # Máximo de requests en paralelo (el controlador adaptativo decide
+    # cuántos usar realmente según cómo responda la API)
+    workers: int = 8
+    # Intentos por request cuando la API responde 429/5xx o hay timeout
+    max_attempts: int = 4
+    # Requests por segundo iniciales y máximos del controlador adaptativo
+    initial_rate: float = 5.0
+    max_rate: float = 50.0
+    # Idiomas a descargar; el primero es el principal
+    locales: List[str] = field(default_factory=lambda: ["en"])
+    # 'pretty' (indentado, como siempre) o 'compact' (sin espacios)
+    output_format: str = 'pretty'
+    # Archivo opcional en formato texto de Prometheus (None = no se genera)
+    prometheus_file: Optional[str] = None
+
+    def __post_init__(self):
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Formato de salida desconocido: {self.output_format}")
+        if not self.locales:
+            raise ValueError("Se necesita al menos un idioma")
+
+    def path(self, filename: str) -> str:
+        """Ruta de un archivo dentro de la carpeta de datos"""
+        return os.path.join(self.data_dir, filename)
+
+    def load_json(self, filename: str) -> Any:
+        """Carga un archivo JSON de la carpeta de datos"""
+        print(f"Cargando {filename}...")
+        with open(self.path(filename), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_json(self, filename: str, data: Any):
+        """Guarda un archivo JSON en la carpeta de datos con el formato configurado"""
+        print(f"Guardando {filename}...")
+        os.makedirs(self.data_dir, exist_ok=True)
+        with open(self.path(filename), 'w', encoding='utf-8') as f:
+            if self.output_format == 'compact':
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=2)
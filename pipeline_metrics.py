@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Instrumentación de los scripts de descarga/conversión de TCGdex.
+
+Registra el tiempo de cada etapa (fetch → convert → index → write),
+la latencia de cada request HTTP, cartas/segundo y el pico de memoria
+(RSS), y genera un reporte JSON de la ejecución y opcionalmente un
+archivo en formato texto de Prometheus.
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Límites (en segundos) del histograma de latencia de requests
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0]
+
+
+def get_peak_rss_bytes() -> Optional[int]:
+    """Devuelve el pico de memoria residente del proceso en bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # En macOS ru_maxrss viene en bytes, en Linux en kilobytes
+    if sys.platform == 'darwin':
+        return peak
+    return peak * 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano de una lista de valores"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RequestRecord:
+    """Resultado de un request medido con PipelineMetrics.track_request()"""
+
+    def __init__(self):
+        self.status = None
+        self.latency = 0.0
+
+
+class PipelineMetrics:
+    """Acumula las métricas de una ejecución de un script"""
+
+    def __init__(self, script: str):
+        self.script = script
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self.latencies: List[float] = []
+        self.status_counts: Dict[str, int] = {}
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mide el tiempo (wall) de una etapa; las llamadas repetidas se acumulan"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+                stage['seconds'] += elapsed
+                stage['calls'] += 1
+
+    @contextmanager
+    def track_request(self):
+        """
+        Mide un request HTTP. El código que lo usa debe asignar
+        record.status con el código de respuesta; si se lanza una
+        excepción, se registra con el nombre de la excepción.
+        """
+        record = RequestRecord()
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.status = type(e).__name__
+            raise
+        finally:
+            record.latency = time.perf_counter() - start
+            self.observe_request(record.latency, record.status)
+
+    def observe_request(self, latency: float, status: Any):
+        """Registra la latencia y el resultado de un request"""
+        status = str(status) if status is not None else 'unknown'
+        with self._lock:
+            self.latencies.append(latency)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+
+    def increment(self, name: str, value: int = 1):
+        """Incrementa un contador (cartas, sets, ...)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Fija el valor de una métrica instantánea"""
+        with self._lock:
+            self.gauges[name] = value
+
+    def request_errors(self) -> int:
+        """Cantidad de requests fallidos (excepciones o códigos >= 400)"""
+        errors = 0
+        for status, count in self.status_counts.items():
+            if not status.isdigit() or int(status) >= 400:
+                errors += count
+        return errors
+
+    def report(self) -> Dict[str, Any]:
+        """Construye el reporte de la ejecución"""
+        wall = time.perf_counter() - self._start
+        with self._lock:
+            latencies = list(self.latencies)
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets['+Inf'] = len(latencies)
+            cards = self.counters.get('cards', 0)
+
+            return {
+                "script": self.script,
+                "startedAt": self.started_at.isoformat() + 'Z',
+                "finishedAt": datetime.now().isoformat() + 'Z',
+                "wallSeconds": round(wall, 3),
+                "stages": {
+                    name: {
+                        "seconds": round(stage['seconds'], 3),
+                        "calls": stage['calls'],
+                        "share": round(stage['seconds'] / wall, 4) if wall else 0.0,
+                    }
+                    for name, stage in self.stages.items()
+                },
+                "requests": {
+                    "count": len(latencies),
+                    "errors": self.request_errors(),
+                    "byStatus": dict(self.status_counts),
+                    "latency": {
+                        "sum": round(sum(latencies), 3),
+                        "p50": round(percentile(latencies, 50), 4),
+                        "p95": round(percentile(latencies, 95), 4),
+                        "p99": round(percentile(latencies, 99), 4),
+                        "max": round(max(latencies), 4) if latencies else 0.0,
+                        "buckets": buckets,
+                    },
+                },
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "cardsPerSecond": round(cards / wall, 2) if wall else 0.0,
+                "peakRssBytes": get_peak_rss_bytes(),
+            }
+
+    def to_prometheus(self) -> str:
+        """Serializa las métricas en formato texto de Prometheus"""
+        report = self.report()
+        label = f'script="{self.script}"'
+        lines = []
+
+        lines.append("# HELP tcg_pipeline_wall_seconds Duración total de la ejecución")
+        lines.append("# TYPE tcg_pipeline_wall_seconds gauge")
+        lines.append(f"tcg_pipeline_wall_seconds{{{label}}} {report['wallSeconds']}")
+
+        lines.append("# HELP tcg_pipeline_stage_seconds Tiempo acumulado por etapa")
+        lines.append("# TYPE tcg_pipeline_stage_seconds gauge")
+        for name, stage in report['stages'].items():
+            lines.append(f'tcg_pipeline_stage_seconds{{{label},stage="{name}"}} {stage["seconds"]}')
+
+        lines.append("# HELP tcg_pipeline_request_seconds Latencia de requests a la API")
+        lines.append("# TYPE tcg_pipeline_request_seconds histogram")
+        latency = report['requests']['latency']
+        for bound, count in latency['buckets'].items():
+            lines.append(f'tcg_pipeline_request_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f"tcg_pipeline_request_seconds_sum{{{label}}} {latency['sum']}")
+        lines.append(f"tcg_pipeline_request_seconds_count{{{label}}} {report['requests']['count']}")
+
+        lines.append("# HELP tcg_pipeline_requests_total Requests por resultado")
+        lines.append("# TYPE tcg_pipeline_requests_total counter")
+        for status, count in report['requests']['byStatus'].items():
+            lines.append(f'tcg_pipeline_requests_total{{{label},status="{status}"}} {count}')
+
+        lines.append("# HELP tcg_pipeline_items_total Contadores de la ejecución")
+        lines.append("# TYPE tcg_pipeline_items_total counter")
+        for name, value in report['counters'].items():
+            lines.append(f'tcg_pipeline_items_total{{{label},item="{name}"}} {value}')
+
+        for name, value in report['gauges'].items():
+            lines.append(f"# TYPE tcg_pipeline_{name} gauge")
+            lines.append(f"tcg_pipeline_{name}{{{label}}} {value}")
+
+        lines.append("# HELP tcg_pipeline_cards_per_second Throughput de cartas procesadas")
+        lines.append("# TYPE tcg_pipeline_cards_per_second gauge")
+        lines.append(f"tcg_pipeline_cards_per_second{{{label}}} {report['cardsPerSecond']}")
+
+        if report['peakRssBytes'] is not None:
+            lines.append("# HELP tcg_pipeline_peak_rss_bytes Pico de memoria residente")
+            lines.append("# TYPE tcg_pipeline_peak_rss_bytes gauge")
+            lines.append(f"tcg_pipeline_peak_rss_bytes{{{label}}} {report['peakRssBytes']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, filepath: str, prometheus_filepath: Optional[str] = None) -> Dict[str, Any]:
+        """Guarda el reporte JSON y, si se indica, el archivo de Prometheus"""
+        report = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if prometheus_filepath:
+            with open(prometheus_filepath, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+        return report
+
+    def print_summary(self):
+        """Imprime un resumen de tiempos por etapa"""
+        report = self.report()
+        print(f"\n⏱️  Tiempos ({report['wallSeconds']:.1f}s en total):")
+        for name, stage in report['stages'].items():
+            print(f"  • {name}: {stage['seconds']:.2f}s ({stage['share'] * 100:.1f}%)")
+        latency = report['requests']['latency']
+        print(f"  • Requests: {report['requests']['count']} "
+              f"(p50 {latency['p50'] * 1000:.0f}ms, p99 {latency['p99'] * 1000:.0f}ms, "
+              f"{report['requests']['errors']} errores)")
+        print(f"  • Throughput: {report['cardsPerSecond']:,} cartas/s")
+        if report['peakRssBytes'] is not None:
+            print(f"  • Pico de memoria: {report['peakRssBytes'] / 1024 / 1024:.1f} MB")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Control adaptativo de concurrencia y tasa de requests a TCGdex (AIMD).
+
+Reemplaza las pausas fijas entre sets: mientras la API responde rápido
+y sin errores, la tasa y la concurrencia suben de forma aditiva; ante un
+429/503, un timeout o un error de conexión, bajan de forma multiplicativa.
+"""
+
+import requests
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from pipeline_config import PipelineConfig
+from pipeline_metrics import PipelineMetrics
+
+# Códigos que indican que la API nos está pidiendo bajar el ritmo
+THROTTLE_STATUS_CODES = {429, 502, 503, 504}
+# Excepciones de requests que cuentan como sobrecarga (por nombre, tal como
+# las registra AdaptiveRateController.request)
+THROTTLE_EXCEPTIONS = {'Timeout', 'ReadTimeout', 'ConnectTimeout', 'ConnectionError'}
+
+
+class RequestsCancelled(Exception):
+    """El controlador se canceló: no se autorizan más requests"""
+
+
+class RateSlot:
+    """Un request autorizado por el controlador"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.status = None
+        self.retry_after = None
+
+    @property
+    def throttled(self) -> bool:
+        """True si la respuesta (o la excepción) indica sobrecarga de la API"""
+        if isinstance(self.status, int):
+            return self.status in THROTTLE_STATUS_CODES
+        return self.status in THROTTLE_EXCEPTIONS
+
+
+class AdaptiveRateController:
+    """
+    Limita requests por segundo y requests en vuelo, ajustando ambos
+    con AIMD según la latencia y los errores observados.
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[PipelineMetrics] = None,
+        initial_rate: float = 5.0,
+        min_rate: float = 0.5,
+        max_rate: float = 50.0,
+        initial_concurrency: float = 2.0,
+        max_concurrency: int = 16,
+        rate_increase: float = 0.5,
+        decrease_factor: float = 0.5,
+        latency_target: float = 2.0,
+    ):
+        self.metrics = metrics
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.rate_increase = rate_increase
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+
+        self._cond = threading.Condition()
+        self._cancelled = threading.Event()
+        self._in_flight = 0
+        self._next_start = 0.0
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._publish()
+
+    def _acquire(self) -> RateSlot:
+        """Espera un lugar libre y el turno que permite la tasa actual"""
+        with self._cond:
+            while not self._cancelled.is_set() and self._in_flight >= max(1, int(self.concurrency)):
+                self._cond.wait()
+            if self._cancelled.is_set():
+                raise RequestsCancelled("Requests cancelados")
+            self._in_flight += 1
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + 1.0 / self.rate
+        wait = start_at - now
+        # Se espera el turno sobre el evento para que cancel() corte también
+        # las esperas largas (p.ej. un Retry-After)
+        cancelled = wait > 0 and self._cancelled.wait(wait)
+        with self._cond:
+            self.wait_seconds += wait
+            if cancelled:
+                self._in_flight -= 1
+                self._cond.notify_all()
+                raise RequestsCancelled("Requests cancelados")
+        return RateSlot(time.monotonic())
+
+    def _release(self, slot: RateSlot):
+        """Libera el lugar y ajusta tasa/concurrencia según el resultado"""
+        latency = time.monotonic() - slot.started
+        with self._cond:
+            self._in_flight -= 1
+            if slot.throttled:
+                self.throttled += 1
+                # Una sola reducción por ráfaga: los requests que empezaron
+                # antes de la última reducción ya no aportan información nueva
+                if slot.started >= self._last_decrease:
+                    self._decrease()
+                if slot.retry_after:
+                    self._next_start = max(self._next_start, time.monotonic() + slot.retry_after)
+            elif isinstance(slot.status, int) and slot.status < 400 and latency <= self.latency_target:
+                self._increase()
+            self._publish()
+            self._cond.notify_all()
+
+    def _increase(self):
+        """
+        Incremento aditivo: cada request sano suma rate_increase/rate, así la
+        tasa sube ~rate_increase req/s por segundo de tráfico sano (y la
+        concurrencia ~+1 por ventana de requests en vuelo)
+        """
+        self.rate = min(self.max_rate, self.rate + self.rate_increase / self.rate)
+        self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / max(1.0, self.concurrency))
+        self.increases += 1
+
+    def _decrease(self):
+        """Reducción multiplicativa de tasa y concurrencia"""
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.concurrency = max(1.0, self.concurrency * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self._next_start = max(self._next_start, self._last_decrease + 1.0 / self.rate)
+        self.decreases += 1
+
+    def _publish(self):
+        """Expone el estado del controlador en las métricas de la ejecución"""
+        if self.metrics is None:
+            return
+        self.metrics.set_gauge('rate_limit_rps', round(self.rate, 3))
+        self.metrics.set_gauge('concurrency_limit', round(self.concurrency, 3))
+        self.metrics.set_gauge('rate_increases', self.increases)
+        self.metrics.set_gauge('rate_decreases', self.decreases)
+        self.metrics.set_gauge('throttled_requests', self.throttled)
+        self.metrics.set_gauge('throttle_wait_seconds', round(self.wait_seconds, 3))
+
+    @contextmanager
+    def request(self):
+        """
+        Autoriza un request. El código que lo usa debe asignar slot.status
+        (y slot.retry_after si la API lo envía); las excepciones se
+        registran con su nombre.
+        """
+        slot = self._acquire()
+        try:
+            yield slot
+        except Exception as e:
+            slot.status = type(e).__name__
+            raise
+        finally:
+            self._release(slot)
+
+    def cancel(self):
+        """
+        Deja de autorizar requests: los que esperan turno y los que se
+        pidan después fallan con RequestsCancelled
+        """
+        with self._cond:
+            self._cancelled.set()
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado actual del controlador"""
+        with self._cond:
+            return {
+                "rate": round(self.rate, 3),
+                "concurrency": round(self.concurrency, 3),
+                "inFlight": self._in_flight,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "throttled": self.throttled,
+                "waitSeconds": round(self.wait_seconds, 3),
+            }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Interpreta el header Retry-After (solo la forma en segundos)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def fetch_json(url: str, timeout: float, config: PipelineConfig, metrics: PipelineMetrics,
+               controller: AdaptiveRateController, label: str = '') -> Any:
+    """
+    GET a la API pasando por el controlador y las métricas. Reintenta
+    mientras la API indique sobrecarga (hasta config.max_attempts) y
+    devuelve el JSON; cualquier otro error (o el último intento) se propaga.
+    """
+    prefix = f"{label}: " if label else ''
+    for attempt in range(1, config.max_attempts + 1):
+        slot = None
+        try:
+            with controller.request() as slot, metrics.track_request() as request:
+                response = requests.get(url, timeout=timeout)
+                request.status = slot.status = response.status_code
+                slot.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            if slot is not None and slot.throttled and attempt < config.max_attempts:
+                print(f"  ↻ {prefix}API saturada ({slot.status}), reintentando...")
+                continue
+            raise
@@ -2,45 +2,44 @@
 """
 Script para re-descargar TODA la data desde TCGdex
 manteniendo el formato EXACTO de PokemonTCG API
+
+Con más de un idioma en config.locales, el primero genera los archivos de
+siempre y los demás se descargan en paralelo por el mismo pipeline,
+guardando solo sus textos traducidos en cards-i18n-{idioma}.json
 """
 
-import json
-import requests
 from datetime import datetime
-from typing import Dict, List, Any
-import time
+from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from card_stats import STATS_FILE, CardStats
+from pipeline_config import PipelineConfig
+from pipeline_metrics import PipelineMetrics
+from rate_controller import AdaptiveRateController, fetch_json
 
-TCGDEX_API = "https://api.tcgdex.net/v2/en"
-DATA_DIR = "/Users/bastiancaba/Desktop/Dev Projects/rpgstore api/pokemon-tcg-data"
+TCGDEX_API_BASE = "https://api.tcgdex.net/v2"
 
-def save_json_file(filename: str, data: Any):
-    """Guarda un archivo JSON"""
-    filepath = f"{DATA_DIR}/{filename}"
-    print(f"Guardando {filename}...")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# Reporte de la ejecución (tiempos, latencias, throughput)
+METRICS_REPORT_FILE = "run-report-rebuild.json"
 
-def get_all_sets_from_tcgdex() -> List[Dict]:
+def get_all_sets_from_tcgdex(config: PipelineConfig, metrics: PipelineMetrics, controller: AdaptiveRateController, locale: str) -> List[Dict]:
     """Obtiene todos los sets desde TCGdex"""
-    print("Obteniendo lista de sets desde TCGdex...")
+    print(f"Obteniendo lista de sets desde TCGdex ({locale})...")
     try:
-        response = requests.get(f"{TCGDEX_API}/sets", timeout=10)
-        response.raise_for_status()
-        sets = response.json()
-        print(f"✓ {len(sets)} sets disponibles")
+        sets = fetch_json(f"{TCGDEX_API_BASE}/{locale}/sets", 10, config, metrics, controller, label=locale)
+        print(f"✓ {len(sets)} sets disponibles ({locale})")
         return sets
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error ({locale}): {e}")
         return []
 
-def get_set_details(set_id: str) -> Dict:
+def get_set_details(config: PipelineConfig, set_id: str, metrics: PipelineMetrics, controller: AdaptiveRateController, locale: str) -> Dict:
     """Obtiene los detalles completos de un set con sus cartas"""
     try:
-        response = requests.get(f"{TCGDEX_API}/sets/{set_id}", timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return fetch_json(f"{TCGDEX_API_BASE}/{locale}/sets/{set_id}", 15, config, metrics, controller,
+                          label=f"{set_id} ({locale})")
     except Exception as e:
-        print(f"  ❌ Error obteniendo {set_id}: {e}")
+        print(f"  ❌ Error obteniendo {set_id} ({locale}): {e}")
         return None
 
 def convert_tcgdex_card_to_pokemontcg_format(tcgdex_card: Dict, tcgdex_set: Dict) -> Dict:
@@ -184,37 +183,127 @@ def convert_tcgdex_card_to_pokemontcg_format(tcgdex_card: Dict, tcgdex_set: Dict
     
     return converted
 
-def main():
+def extract_localized_strings(card: Dict) -> Dict:
+    """
+    Extrae los textos que dependen del idioma de una carta ya convertida.
+    Ataques y habilidades quedan en el mismo orden que en la carta base.
+    """
+    strings = {"name": card.get('name', '')}
+    if card.get('abilities'):
+        strings['abilities'] = [
+            {'name': ability.get('name', ''), 'text': ability.get('text', '')}
+            for ability in card['abilities']
+        ]
+    if card.get('attacks'):
+        strings['attacks'] = [
+            {'name': attack.get('name', ''), 'text': attack.get('text', '')}
+            for attack in card['attacks']
+        ]
+    if card.get('evolvesFrom'):
+        strings['evolvesFrom'] = card['evolvesFrom']
+    if card.get('flavorText'):
+        strings['flavorText'] = card['flavorText']
+    return strings
+
+def build_localized_catalog(locale: str, sets: List[Dict], futures: List, known_ids: set, metrics: PipelineMetrics) -> Dict:
+    """
+    Procesa los sets de un idioma adicional. Las cartas que ya existen en
+    el idioma principal solo guardan sus textos traducidos; las exclusivas
+    de este idioma (sin equivalente) se guardan completas.
+    """
+    catalog = {"locale": locale, "sets": {}, "strings": {}, "cards": []}
+    
+    for i, (tcgdex_set_summary, future) in enumerate(zip(sets, futures), 1):
+        set_id = tcgdex_set_summary.get('id')
+        print(f"[{locale}] [{i}/{len(sets)}] {tcgdex_set_summary.get('name')} ({set_id})")
+        
+        with metrics.stage("fetch"):
+            set_details = future.result()
+        if not set_details or 'cards' not in set_details:
+            print(f"  ⚠️ Sin cartas")
+            continue
+        
+        with metrics.stage("convert"):
+            set_cards = [
+                convert_tcgdex_card_to_pokemontcg_format(tcgdex_card, set_details)
+                for tcgdex_card in set_details.get('cards', [])
+            ]
+        
+        with metrics.stage("index"):
+            catalog['sets'][set_id] = {"name": set_details.get('name', '')}
+            for converted_card in set_cards:
+                if converted_card['id'] in known_ids:
+                    catalog['strings'][converted_card['id']] = extract_localized_strings(converted_card)
+                else:
+                    catalog['cards'].append(converted_card)
+        metrics.increment("localized_cards", len(set_cards))
+    
+    return catalog
+
+def rebuild_dataset(config: PipelineConfig, metrics: PipelineMetrics, controller: AdaptiveRateController,
+                    executor: ThreadPoolExecutor, set_ids: Optional[List[str]] = None):
+    """
+    Reconstruye todo el dataset. Con set_ids solo se descargan esos sets
+    (útil para pruebas y benchmarks en una carpeta aparte).
+    """
+
     print("=" * 80)
     print("RE-DESCARGA COMPLETA DESDE TCGdex")
     print("Manteniendo formato PokemonTCG API")
     print("=" * 80)
     
-    # 1. Obtener todos los sets
-    all_sets = get_all_sets_from_tcgdex()
+    primary_locale = config.locales[0]
+    
+    # 1. Obtener todos los sets (de todos los idiomas a la vez)
+    list_futures = {
+        locale: executor.submit(get_all_sets_from_tcgdex, config, metrics, controller, locale)
+        for locale in config.locales
+    }
+    with metrics.stage("fetch"):
+        sets_by_locale = {locale: future.result() for locale, future in list_futures.items()}
+    if set_ids:
+        sets_by_locale = {
+            locale: [s for s in sets if s.get('id') in set_ids]
+            for locale, sets in sets_by_locale.items()
+        }
+    all_sets = sets_by_locale[primary_locale]
     if not all_sets:
         print("❌ No se pudieron obtener los sets")
         return
     
     print(f"\n📥 Se descargarán {len(all_sets)} sets completos")
+    for locale in config.locales[1:]:
+        print(f"🌐 + {len(sets_by_locale[locale])} sets en '{locale}' (solo textos traducidos)")
     print("Esto tomará varios minutos...\n")
     
+    # Todos los sets de todos los idiomas comparten el mismo pool y el
+    # mismo controlador de ritmo; se procesan en el orden original
+    futures_by_locale = {
+        locale: [
+            executor.submit(get_set_details, config, tcgdex_set_summary.get('id'), metrics, controller, locale)
+            for tcgdex_set_summary in sets
+        ]
+        for locale, sets in sets_by_locale.items()
+    }
+    
     # Estructuras para almacenar los datos
     all_cards = []
     index_by_set = {}
     index_by_type = {}
     index_by_name = {}
+    stats = CardStats()
     
-    # 2. Descargar cada set
+    # 2. Descargar cada set del idioma principal
     total_cards = 0
-    for i, tcgdex_set_summary in enumerate(all_sets, 1):
+    for i, (tcgdex_set_summary, future) in enumerate(zip(all_sets, futures_by_locale[primary_locale]), 1):
         set_id = tcgdex_set_summary.get('id')
         set_name = tcgdex_set_summary.get('name')
         
         print(f"[{i}/{len(all_sets)}] {set_name} ({set_id})")
         
-        # Obtener detalles completos del set
-        set_details = get_set_details(set_id)
+        # Esperar los detalles completos del set
+        with metrics.stage("fetch"):
+            set_details = future.result()
         if not set_details or 'cards' not in set_details:
             print(f"  ⚠️ Sin cartas")
             continue
@@ -223,41 +312,56 @@ def main():
         print(f"  📥 {len(cards)} cartas")
         
         # Convertir cada carta
-        set_cards = []
-        for tcgdex_card in cards:
-            converted_card = convert_tcgdex_card_to_pokemontcg_format(tcgdex_card, set_details)
-            
-            # Agregar a todas las estructuras
-            all_cards.append(converted_card)
-            set_cards.append(converted_card)
-            
-            # Index by type
-            types = converted_card.get('types', [converted_card.get('supertype', 'Unknown')])
-            for card_type in types:
-                if card_type not in index_by_type:
-                    index_by_type[card_type] = []
-                index_by_type[card_type].append(converted_card)
-            
-            # Index by name
-            name = converted_card.get('name', 'Unknown')
-            if name not in index_by_name:
-                index_by_name[name] = []
-            index_by_name[name].append(converted_card)
+        with metrics.stage("convert"):
+            set_cards = [
+                convert_tcgdex_card_to_pokemontcg_format(tcgdex_card, set_details)
+                for tcgdex_card in cards
+            ]
         
-        # Index by set
-        index_by_set[set_id] = set_cards
+        with metrics.stage("index"):
+            for converted_card in set_cards:
+                # Agregar a todas las estructuras
+                all_cards.append(converted_card)
+                
+                # Index by type
+                types = converted_card.get('types', [converted_card.get('supertype', 'Unknown')])
+                for card_type in types:
+                    if card_type not in index_by_type:
+                        index_by_type[card_type] = []
+                    index_by_type[card_type].append(converted_card)
+                
+                # Index by name
+                name = converted_card.get('name', 'Unknown')
+                if name not in index_by_name:
+                    index_by_name[name] = []
+                index_by_name[name].append(converted_card)
+                
+                # Estadísticas (facetas)
+                stats.add(converted_card)
+            
+            # Index by set
+            index_by_set[set_id] = set_cards
         total_cards += len(cards)
+        metrics.increment("sets")
+        metrics.increment("cards", len(cards))
         
         print(f"  ✓ {len(cards)} cartas convertidas")
         
-        # Pequeña pausa para no sobrecargar la API
         if i % 10 == 0:
-            print(f"\n  💤 Pausa breve... ({i}/{len(all_sets)} sets completados)\n")
-            time.sleep(2)
-        else:
-            time.sleep(0.2)
+            state = controller.snapshot()
+            print(f"\n  📶 Ritmo: {state['rate']:.1f} req/s, {state['concurrency']:.1f} en paralelo "
+                  f"({i}/{len(all_sets)} sets completados)\n")
     
-    # 3. Crear metadata
+    # 3. Idiomas adicionales: textos traducidos por carta
+    known_ids = {card['id'] for card in all_cards}
+    localized_catalogs = {}
+    for locale in config.locales[1:]:
+        print(f"\n🌐 Procesando idioma '{locale}'...")
+        localized_catalogs[locale] = build_localized_catalog(
+            locale, sets_by_locale[locale], futures_by_locale[locale], known_ids, metrics
+        )
+    
+    # 4. Crear metadata
     metadata = {
         "totalCards": len(all_cards),
         "lastUpdated": datetime.now().isoformat() + 'Z',
@@ -269,19 +373,31 @@ def main():
             "byType": len(index_by_type)
         }
     }
+    if localized_catalogs:
+        metadata['locales'] = {
+            locale: {
+                "translatedCards": len(catalog['strings']),
+                "exclusiveCards": len(catalog['cards']),
+            }
+            for locale, catalog in localized_catalogs.items()
+        }
     
-    # 4. Guardar archivos
+    # 5. Guardar archivos
     print("\n" + "=" * 80)
     print("Guardando archivos...")
     print("=" * 80)
     
-    save_json_file('all-cards.json', all_cards)
-    save_json_file('index-by-set.json', index_by_set)
-    save_json_file('index-by-type.json', index_by_type)
-    save_json_file('index-by-name.json', index_by_name)
-    save_json_file('cards-metadata.json', metadata)
+    with metrics.stage("write"):
+        config.save_json('all-cards.json', all_cards)
+        config.save_json('index-by-set.json', index_by_set)
+        config.save_json('index-by-type.json', index_by_type)
+        config.save_json('index-by-name.json', index_by_name)
+        config.save_json(STATS_FILE, stats.to_dict())
+        for locale, catalog in localized_catalogs.items():
+            config.save_json(f'cards-i18n-{locale}.json', catalog)
+        config.save_json('cards-metadata.json', metadata)
     
-    # 5. Resumen
+    # 6. Resumen
     print("\n" + "=" * 80)
     print("✅ DESCARGA COMPLETADA")
     print("=" * 80)
@@ -289,6 +405,9 @@ def main():
     print(f"Total de cartas: {len(all_cards):,}")
     print(f"Cartas únicas por nombre: {len(index_by_name):,}")
     print(f"Tipos de carta: {len(index_by_type)}")
+    for locale, catalog in localized_catalogs.items():
+        print(f"Idioma '{locale}': {len(catalog['strings']):,} cartas traducidas, "
+              f"{len(catalog['cards']):,} exclusivas")
     print(f"\nFuente: TCGdex API")
     print(f"Formato: PokemonTCG API (compatible)")
     print(f"Última actualización: {metadata['lastUpdated']}")
@@ -296,7 +415,35 @@ def main():
     print(f"  • Todas desde TCGdex")
     print(f"  • Sin reverso de carta")
     print(f"  • Alta calidad disponible")
-    print("=" * 80)
+    state = controller.snapshot()
+    print(f"\n📶 Ritmo final: {state['rate']:.1f} req/s, {state['concurrency']:.1f} en paralelo "
+          f"({state['decreases']} reducciones, {state['throttled']} requests limitados)")
+    metrics.print_summary()
+
+def main(config: Optional[PipelineConfig] = None, set_ids: Optional[List[str]] = None):
+    """Ejecuta rebuild_dataset y guarda el reporte de la ejecución"""
+    config = config or PipelineConfig()
+    metrics = PipelineMetrics("rebuild")
+    controller = AdaptiveRateController(
+        metrics=metrics,
+        initial_rate=config.initial_rate,
+        max_rate=config.max_rate,
+        max_concurrency=config.workers,
+    )
+    executor = ThreadPoolExecutor(max_workers=config.workers)
+    try:
+        rebuild_dataset(config, metrics, controller, executor, set_ids)
+    finally:
+        # Ante un error o Ctrl-C no se siguen descargando los sets en cola
+        controller.cancel()
+        executor.shutdown(cancel_futures=True)
+        # El reporte se escribe también si la ejecución terminó antes o falló
+        metrics.write_report(
+            config.path(METRICS_REPORT_FILE),
+            config.path(config.prometheus_file) if config.prometheus_file else None,
+        )
+        print(f"\n📊 Reporte de la ejecución: {METRICS_REPORT_FILE}")
+        print("=" * 80)
 
 if __name__ == "__main__":
     main()
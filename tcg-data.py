@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+CLI único para los scripts del dataset:
+
+    python3 tcg-data.py rebuild          # re-descarga todo desde TCGdex
+    python3 tcg-data.py sync             # agrega los sets que falten
+    python3 tcg-data.py migrate-images   # pasa las imágenes a TCGdex
+    python3 tcg-data.py verify           # revisa la consistencia de los JSON
+    python3 tcg-data.py bench            # prueba de carga del catálogo
+    python3 tcg-data.py serve            # catálogo por HTTP local
+    python3 tcg-data.py package          # snapshot + delta para distribuir
+    python3 tcg-data.py apply --source   # actualiza una copia local con un paquete
+
+Todas las opciones comunes (--data-dir, --workers, --rate, ...) se pueden
+indicar después del subcomando. Con carpetas distintas se pueden correr
+varios builds en paralelo y comparar sus run-report-*.json.
+"""
+
+import argparse
+import dataclasses
+import importlib
+import json
+import sys
+from typing import List, Optional
+
+from pipeline_config import OUTPUT_FORMATS, PipelineConfig
+
+
+def load_script(name: str):
+    """Importa uno de los scripts (sus nombres llevan guiones)"""
+    return importlib.import_module(name)
+
+
+def split_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Las opciones comunes usan el nombre del campo de PipelineConfig como
+    # dest y solo aparecen en args si se indicaron: el resto de los valores
+    # salen de los defaults de PipelineConfig
+    common = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+    common.add_argument('--data-dir', dest='data_dir',
+                        help="carpeta con los JSON (por defecto $POKEMON_TCG_DATA_DIR o la del repo)")
+    common.add_argument('--workers', type=int,
+                        help=f"máximo de requests en paralelo (por defecto {PipelineConfig.workers})")
+    common.add_argument('--max-attempts', type=int, dest='max_attempts',
+                        help=f"intentos por request ante 429/5xx/timeouts (por defecto {PipelineConfig.max_attempts})")
+    common.add_argument('--rate', type=float, dest='initial_rate', metavar='RATE',
+                        help=f"requests por segundo iniciales (por defecto {PipelineConfig.initial_rate})")
+    common.add_argument('--max-rate', type=float, dest='max_rate',
+                        help=f"máximo de requests por segundo (por defecto {PipelineConfig.max_rate})")
+    common.add_argument('--format', choices=OUTPUT_FORMATS, dest='output_format',
+                        help=f"formato de los JSON generados (por defecto {PipelineConfig.output_format})")
+    common.add_argument('--prometheus', dest='prometheus_file', metavar='ARCHIVO',
+                        help="genera además las métricas en formato Prometheus")
+
+    parser = argparse.ArgumentParser(
+        prog='tcg-data.py',
+        description="Dataset de cartas Pokémon TCG (TCGdex → formato PokemonTCG API)",
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild', parents=[common], help="re-descarga todo desde TCGdex")
+    rebuild.add_argument('--locales', type=split_list, default=argparse.SUPPRESS,
+                         help="idiomas separados por coma; el primero es el principal (p.ej. en,es,ja; por defecto en)")
+    rebuild.add_argument('--sets', type=split_list, default=None,
+                         help="solo estos sets (separados por coma); requiere --data-dir")
+
+    sync = commands.add_parser('sync', parents=[common], help="agrega sets nuevos al dataset existente")
+    sync.add_argument('--sets', type=split_list, default=None,
+                      help="sets a agregar; por defecto, los que falten respecto de TCGdex")
+
+    commands.add_parser('migrate-images', parents=[common], help="migra las URLs de imágenes a TCGdex")
+    commands.add_parser('verify', parents=[common], help="verifica la consistencia de los JSON")
+
+    bench = commands.add_parser('bench', parents=[common], help="prueba de carga del catálogo")
+    bench.add_argument('--requests', type=int, default=50000, help="total de consultas")
+    bench.add_argument('--threads', type=int, default=8, help="hilos que hacen consultas")
+    bench.add_argument('--cache-size', type=int, default=2048, help="tamaño del LRU")
+    bench.add_argument('--output', default=None, metavar='ARCHIVO',
+                       help="guarda los resultados en JSON")
+
+    serve = commands.add_parser('serve', parents=[common], help="sirve el catálogo por HTTP local")
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--cache-size', type=int, default=2048, help="tamaño del LRU")
+
+    package = commands.add_parser('package', parents=[common],
+                                  help="genera una nueva generación (snapshot + delta) para distribuir")
+    package.add_argument('--package-dir', default=None, metavar='CARPETA',
+                         help="carpeta de los paquetes (por defecto <data-dir>/dist)")
+
+    apply = commands.add_parser('apply', parents=[common],
+                                help="actualiza la copia local con el último paquete")
+    apply.add_argument('--source', required=True, metavar='CARPETA_O_URL',
+                       help="carpeta o URL base donde están manifest.json y los paquetes")
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # Un rebuild parcial reemplaza el dataset entero: no se hace sobre la carpeta por defecto
+    if args.command == 'rebuild' and args.sets and 'data_dir' not in args:
+        parser.error("rebuild --sets requiere indicar --data-dir (una carpeta aparte para no pisar el dataset)")
+    config_fields = {field.name for field in dataclasses.fields(PipelineConfig)}
+    config = PipelineConfig(**{name: value for name, value in vars(args).items() if name in config_fields})
+
+    if args.command == 'rebuild':
+        load_script('rebuild-from-tcgdex').main(config, set_ids=args.sets)
+    elif args.command == 'sync':
+        load_script('fetch-missing-sets').main(config, set_ids=args.sets, detect=args.sets is None)
+    elif args.command == 'migrate-images':
+        load_script('migrate-all-images-to-tcgdex').main(config)
+    elif args.command == 'verify':
+        return 0 if load_script('verify-data').main(config) else 1
+    elif args.command == 'bench':
+        summary = load_script('load-test-catalog').main(
+            config, total_requests=args.requests, threads=args.threads, cache_size=args.cache_size
+        )
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+    elif args.command == 'serve':
+        from catalog import Catalog, serve
+        serve(Catalog(config.data_dir, cache_size=args.cache_size), args.port)
+    elif args.command == 'package':
+        from dataset_package import build_package
+        build_package(config, args.package_dir)
+    elif args.command == 'apply':
+        from dataset_package import apply_package
+        return 0 if apply_package(config, args.source) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
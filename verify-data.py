@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Script para verificar que los JSON generados sean consistentes entre sí:
+metadata, all-cards.json, los tres índices, cards-stats.json y los
+archivos de idiomas adicionales.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from card_stats import STATS_FILE, CardStats
+from pipeline_config import PipelineConfig
+
+# Máximo de problemas de cada tipo que se muestran
+MAX_SHOWN = 10
+
+
+def count_by(cards: List[Dict], keys_of) -> Dict[str, int]:
+    """Cuenta cartas por clave (una carta puede tener varias)"""
+    counts: Dict[str, int] = {}
+    for card in cards:
+        for key in keys_of(card):
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def compare_index(name: str, index: Dict[str, List[Dict]], expected: Dict[str, int], problems: List[str]):
+    """Compara la cantidad de cartas por clave de un índice con lo esperado"""
+    actual = {key: len(cards) for key, cards in index.items()}
+    for key in sorted(set(actual) | set(expected)):
+        if actual.get(key, 0) != expected.get(key, 0):
+            problems.append(f"{name}[{key}]: {actual.get(key, 0)} cartas, se esperaban {expected.get(key, 0)}")
+
+
+def main(config: Optional[PipelineConfig] = None) -> bool:
+    config = config or PipelineConfig()
+    print("=" * 80)
+    print("VERIFICACIÓN DE DATOS")
+    print(f"Carpeta: {config.data_dir}")
+    print("=" * 80)
+
+    all_cards = config.load_json('all-cards.json')
+    index_by_set = config.load_json('index-by-set.json')
+    index_by_type = config.load_json('index-by-type.json')
+    index_by_name = config.load_json('index-by-name.json')
+    metadata = config.load_json('cards-metadata.json')
+
+    problems: List[str] = []
+
+    # 1. Metadata
+    if metadata.get('totalCards') != len(all_cards):
+        problems.append(f"metadata.totalCards = {metadata.get('totalCards')}, all-cards.json tiene {len(all_cards)}")
+    for key, index in (('byName', index_by_name), ('bySet', index_by_set), ('byType', index_by_type)):
+        if metadata.get('indices', {}).get(key) != len(index):
+            problems.append(f"metadata.indices.{key} = {metadata.get('indices', {}).get(key)}, el índice tiene {len(index)}")
+
+    # 2. IDs duplicados
+    seen = set()
+    duplicates = set()
+    for card in all_cards:
+        if card['id'] in seen:
+            duplicates.add(card['id'])
+        seen.add(card['id'])
+    if duplicates:
+        problems.append(f"{len(duplicates)} IDs duplicados en all-cards.json (p.ej. {sorted(duplicates)[0]})")
+
+    # 3. Cada carta debe estar igual en index-by-set.json
+    cards_in_sets = {card['id']: card for cards in index_by_set.values() for card in cards}
+    for card in all_cards:
+        indexed = cards_in_sets.get(card['id'])
+        if indexed is None:
+            problems.append(f"{card['id']} no está en index-by-set.json")
+        elif indexed != card:
+            problems.append(f"{card['id']} es distinta en index-by-set.json")
+    for card_id in set(cards_in_sets) - seen:
+        problems.append(f"{card_id} está en index-by-set.json pero no en all-cards.json")
+
+    # 4. Índices por tipo y nombre (mismo criterio que al generarlos)
+    compare_index('index-by-type', index_by_type,
+                  count_by(all_cards, lambda c: c.get('types', [c.get('supertype', 'Unknown')])), problems)
+    compare_index('index-by-name', index_by_name,
+                  count_by(all_cards, lambda c: [c.get('name', 'Unknown')]), problems)
+
+    # 5. Estadísticas
+    if os.path.exists(config.path(STATS_FILE)):
+        stats = config.load_json(STATS_FILE)
+        if stats != CardStats.from_cards(all_cards).to_dict():
+            problems.append(f"{STATS_FILE} no coincide con all-cards.json")
+    else:
+        print(f"  ⚠️ No existe {STATS_FILE}")
+
+    # 6. Idiomas adicionales
+    for locale in metadata.get('locales', {}):
+        filename = f'cards-i18n-{locale}.json'
+        if not os.path.exists(config.path(filename)):
+            problems.append(f"Falta {filename}")
+            continue
+        localized = config.load_json(filename)
+        unknown = [card_id for card_id in localized.get('strings', {}) if card_id not in seen]
+        if unknown:
+            problems.append(f"{filename}: {len(unknown)} traducciones de cartas inexistentes (p.ej. {unknown[0]})")
+
+    # 7. Resumen
+    print("\n" + "=" * 80)
+    if problems:
+        print(f"❌ {len(problems)} PROBLEMAS ENCONTRADOS")
+        print("=" * 80)
+        for problem in problems[:MAX_SHOWN]:
+            print(f"  • {problem}")
+        if len(problems) > MAX_SHOWN:
+            print(f"  ... y {len(problems) - MAX_SHOWN} más")
+    else:
+        print("✅ DATOS CONSISTENTES")
+        print("=" * 80)
+        print(f"Cartas: {len(all_cards):,}")
+        print(f"Sets: {len(index_by_set)}")
+        print(f"Última actualización: {metadata.get('lastUpdated')}")
+    print("=" * 80)
+    return not problems
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)